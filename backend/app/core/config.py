@@ -18,6 +18,9 @@ class Settings:
     AWS_SECRET_ACCESS_KEY: str = os.getenv("AWS_SECRET_ACCESS_KEY", "")
     AWS_REGION: str = os.getenv("AWS_REGION", "us-east-1")
     AWS_TEMP_BUCKET: str = os.getenv("AWS_TEMP_BUCKET", "")
+
+    # Video encoding - use a hardware H.264 encoder when one is available
+    VIDEO_HW_ACCEL: bool = os.getenv("VIDEO_HW_ACCEL", "false").lower() in ("1", "true", "yes")
     
     def validate(self):
         # Required settings for all environments
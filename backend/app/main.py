@@ -36,6 +36,15 @@ async def lifespan(app: FastAPI):
             # Create tables (can be safely called multiple times)
             await conn.run_sync(Base.metadata.create_all)
             
+            # Databases created before transcripts moved to JSONB still have a JSON column
+            await conn.execute(text(
+                "DO $$ BEGIN "
+                "IF EXISTS (SELECT 1 FROM information_schema.columns "
+                "WHERE table_name = 'transcripts' AND column_name = 'text' AND data_type = 'json') THEN "
+                "ALTER TABLE transcripts ALTER COLUMN text TYPE JSONB USING text::jsonb; "
+                "END IF; END $$"
+            ))
+            
         logger.info("Database connection successful and tables created")
     except Exception as e:
         logger.error(f"Database connection or table creation failed: {e}")
@@ -1,7 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db import Base
+from functools import cached_property
 import uuid
 
 def generate_uuid():
@@ -24,6 +26,11 @@ class Transcript(Base):
     __tablename__ = "transcripts"
     id = Column(Integer, primary_key=True, index=True)
     video_id = Column(Integer, ForeignKey("videos.id"), nullable=False)
-    text = Column(JSON, nullable=False)
+    text = Column(JSONB, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     video = relationship("Video", back_populates="transcript")
+
+    @cached_property
+    def segments(self):
+        """Transcript segments from the JSONB payload"""
+        return self.text.get('segments', [])
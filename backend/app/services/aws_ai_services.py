@@ -18,6 +18,9 @@ import time
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Audio container formats accepted by Amazon Transcribe's MediaFormat
+TRANSCRIBE_MEDIA_FORMATS = {'mp3', 'mp4', 'wav', 'flac', 'ogg', 'amr', 'webm', 'm4a'}
+
 class AWSAIServices:
     def __init__(self):
         """Initialize AWS AI service clients"""
@@ -51,8 +54,13 @@ class AWSAIServices:
             # Generate unique job name
             job_name = f"clipso-transcribe-{int(time.time())}-{hashlib.md5(audio_file_path.encode()).hexdigest()[:8]}"
             
+            # Transcribe needs the container format; default to mp3 for unknown extensions
+            media_format = os.path.splitext(audio_file_path)[1].lstrip('.').lower()
+            if media_format not in TRANSCRIBE_MEDIA_FORMATS:
+                media_format = 'mp3'
+            
             # Upload audio file to S3 (temporary)
-            s3_key = f"temp-audio/{job_name}.mp3"
+            s3_key = f"temp-audio/{job_name}.{media_format}"
             
             # For this implementation, we'll use the existing R2 storage
             # In production, you might want a dedicated AWS S3 bucket for temp files
@@ -69,7 +77,7 @@ class AWSAIServices:
             response = self.transcribe_client.start_transcription_job(
                 TranscriptionJobName=job_name,
                 Media={'MediaFileUri': media_uri},
-                MediaFormat='mp3',  # Adjust based on actual format
+                MediaFormat=media_format,
                 LanguageCode=language_code,
                 Settings={
                     'ShowSpeakerLabels': False,
@@ -215,8 +223,9 @@ class AWSAIServices:
         
         try:
             # Delete temporary S3 file (from R2 in our case)
-            from app.services.r2 import s3, BUCKET
+            from app.services.r2 import s3, BUCKET, invalidate_exists
             s3.delete_object(Bucket=BUCKET, Key=s3_key)
+            invalidate_exists(s3_key)
             logger.info(f"Deleted temporary file: {s3_key}")
         except Exception as e:
             logger.warning(f"Failed to delete temporary file {s3_key}: {e}")
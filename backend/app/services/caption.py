@@ -301,9 +301,13 @@ async def generate_transcript(video_filename: str,
         # Try different approaches to serialize the response
         try:
             import json
-            # First attempt direct serialization
-            transcript_data = json.loads(
-                json.dumps(transcript_resp, default=custom_json_encoder))
+            if isinstance(transcript_resp, dict):
+                # AWS Transcribe responses are already plain JSON data for the JSONB column
+                transcript_data = transcript_resp
+            else:
+                # First attempt direct serialization
+                transcript_data = json.loads(
+                    json.dumps(transcript_resp, default=custom_json_encoder))
             logger.info("Successfully serialized transcript response")
         except Exception as e:
             # If that fails, extract key data manually
@@ -886,7 +890,9 @@ async def generate_final_video(filename: str, db: AsyncSession = None) -> str:
                             resized_img = img.resize((new_width, new_height))
 
                         # Convert PIL Image to numpy array for MoviePy
-                        img_array = np.array(resized_img)
+                        # asarray wraps the image buffer without a second copy; ImageClip only reads it
+                        resized_img.load()
+                        img_array = np.asarray(resized_img)
 
                         # Create clip directly from the pre-resized image
                         from moviepy.editor import ImageClip
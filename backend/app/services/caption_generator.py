@@ -16,7 +16,7 @@ from moviepy.editor import (
 )
 
 from .text_drawer import (
-    create_styled_caption,
+    create_styled_captions,
     create_text_ex,
     Word,
     Character,
@@ -100,7 +100,7 @@ async def generate_styled_captions(
     # Create temp directory for processing
     with tempfile.TemporaryDirectory() as temp_dir:
         # Extract audio for transcription
-        audio_file = os.path.join(temp_dir, "audio.wav")
+        audio_file = os.path.join(temp_dir, "audio.ogg")
         audio_file = extract_audio(video_file, audio_file)
         logger.info(f"Extracted audio to {audio_file}")
         
@@ -128,27 +128,25 @@ async def generate_styled_captions(
         # Create video with captions
         clips = [video]  # Start with original video
         
+        # Position at bottom of frame with margin
+        y_position = video_height - (video_height * bottom_margin)
+        position = ("center", y_position)
+        
+        # Render all caption texts in one batch
+        # (convert to uppercase for better readability)
+        text_clips = create_styled_captions(
+            [caption["text"].upper() for caption in captions],
+            video_width,
+            fontsize=font_size,
+            color=font_color,
+            stroke_color=stroke_color,
+            stroke_width=stroke_width,
+            blur_shadow=shadow,
+            blur_radius=shadow_blur
+        )
+        
         # Process each caption
-        for caption in captions:
-            # Position at bottom of frame with margin
-            y_position = video_height - (video_height * bottom_margin)
-            position = ("center", y_position)
-            
-            # Create caption text (convert to uppercase for better readability)
-            text = caption["text"].upper()
-            
-            # Create text clip
-            text_clip = create_styled_caption(
-                text=text,
-                video_width=video_width,
-                fontsize=font_size,
-                color=font_color,
-                stroke_color=stroke_color,
-                stroke_width=stroke_width,
-                blur_shadow=shadow,
-                blur_radius=shadow_blur
-            )
-            
+        for caption, text_clip in zip(captions, text_clips):
             # Set timing and position
             text_clip = text_clip.set_position(position)
             text_clip = text_clip.set_start(caption["start"])
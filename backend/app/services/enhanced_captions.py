@@ -4,31 +4,40 @@ Integrates advanced text rendering with the existing system
 """
 
 import os
+import asyncio
+import subprocess
 import tempfile
 import logging
-import json
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 
+import requests
+from moviepy.editor import VideoFileClip
+from PIL import Image
+
 # Import database-related modules
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 # Import our app modules
-from .r2 import upload_fileobj, get_file_url, file_exists
+from .caption import fetch_b_roll
+from .r2 import upload_fileobj, get_file_url, file_exists, s3, BUCKET
 from .segment_parser import parse as parse_segments
-from .text_drawer import create_styled_caption
+from .text_drawer import FONT_PATH, _get_font
 from app.models import Video, Transcript
 from app.db import AsyncSessionLocal
 from app.core.config import settings
 
-# We'll import these dynamically in functions to avoid issues
-# import boto3
-# import numpy as np
-# from moviepy.editor import VideoFileClip, CompositeVideoClip, ImageClip
-
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Hardware H.264 encoders in order of preference, with quality-tuned settings
+HW_ENCODERS = {
+    "h264_nvenc": ["-preset", "p5", "-rc", "vbr", "-cq", "23", "-pix_fmt", "yuv420p"],
+    "h264_videotoolbox": ["-b:v", "8M", "-pix_fmt", "yuv420p"],
+    "h264_qsv": ["-preset", "medium", "-global_quality", "23", "-pix_fmt", "nv12"],
+}
+
 async def generate_enhanced_final_video(filename: str, db: AsyncSession = None) -> str:
     """
     Generate the final video with enhanced stylish captions
@@ -41,9 +50,6 @@ async def generate_enhanced_final_video(filename: str, db: AsyncSession = None)
     Returns:
         URL to the final video in R2 storage
     """
-    # Import moviepy here to avoid import issues
-    from moviepy.editor import VideoFileClip, CompositeVideoClip
-    
     logger.info(f"Starting enhanced final video generation for: {filename}")
     
     # Use the provided db session or create a new one
@@ -71,10 +77,6 @@ async def _generate_enhanced_final_video(db: AsyncSession, filename: str) -> str
     """
     Internal implementation of enhanced final video generation
     """
-    # Import moviepy here to avoid circular imports
-    from moviepy.editor import VideoFileClip, CompositeVideoClip, ImageClip
-    import numpy as np
-    
     # Get video record with an explicit select
     logger.info(f"Fetching video record for: {filename}")
     result = await db.execute(select(Video).where(Video.filename == filename))
@@ -105,24 +107,12 @@ async def _generate_enhanced_final_video(db: AsyncSession, filename: str) -> str
     
     # Create temporary directory for processing
     with tempfile.TemporaryDirectory() as temp_dir:
-        # Import boto3 here to avoid import issues
-        import boto3
-        
-        # Download video from R2
-        r2_client = boto3.client(
-            service_name='s3',
-            endpoint_url=settings.R2_ENDPOINT,
-            aws_access_key_id=settings.R2_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.R2_SECRET_ACCESS_KEY,
-        )
-        
-        # Download the video file
+        # Download the video file from R2 with the shared client
         temp_video_path = os.path.join(temp_dir, filename)
         logger.info(f"Downloading video from R2: {video.r2_key} to {temp_video_path}")
-        r2_client.download_file(settings.R2_BUCKET, video.r2_key, temp_video_path)
+        s3.download_file(BUCKET, video.r2_key, temp_video_path)
         
         # Convert WebM to MP4 first to avoid issues with MoviePy not being able to read WebM duration
-        import subprocess
         temp_mp4_path = os.path.join(temp_dir, f"{os.path.splitext(filename)[0]}.mp4")
         logger.info(f"Converting WebM to MP4: {temp_video_path} -> {temp_mp4_path}")
         
@@ -130,9 +120,10 @@ async def _generate_enhanced_final_video(db: AsyncSession, filename: str) -> str
             # Run FFmpeg to convert the WebM to MP4
             ffmpeg_cmd = [
                 "ffmpeg", "-i", temp_video_path, 
-                "-c:v", "libx264", "-c:a", "aac", 
+                *_video_codec_args(["-pix_fmt", "yuv420p"]),
+                "-c:a", "aac", 
                 "-strict", "experimental", 
-                "-b:a", "192k", "-pix_fmt", "yuv420p",
+                "-b:a", "192k",
                 temp_mp4_path
             ]
             subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
@@ -145,35 +136,10 @@ async def _generate_enhanced_final_video(db: AsyncSession, filename: str) -> str
         video_clip = VideoFileClip(temp_mp4_path)
         logger.info(f"Loaded video: {temp_mp4_path}, duration: {video_clip.duration:.2f}s")
         
-        # Get transcript data directly (using our explicitly loaded transcript)
-        # Handle if transcript.text is already a dict or if it's a JSON string
-        try:
-            if isinstance(transcript.text, dict):
-                transcript_data = transcript.text
-                logger.info("Transcript.text is already a dictionary, using directly")
-            else:
-                transcript_data = json.loads(transcript.text)
-                logger.info("Parsed transcript.text from JSON string")
-        except Exception as e:
-            logger.error(f"Error parsing transcript data: {e}")
-            # Fallback - try to convert to string first if it's not already
-            try:
-                if not isinstance(transcript.text, str):
-                    transcript_text = json.dumps(transcript.text)
-                    transcript_data = json.loads(transcript_text)
-                    logger.info("Used fallback transcript parsing method")
-                else:
-                    raise ValueError("Unable to parse transcript text in any format")
-            except Exception as inner_e:
-                logger.error(f"Fallback transcript parsing failed: {inner_e}")
-                raise ValueError(f"Could not parse transcript data: {e}, {inner_e}")
-        
-        segments = transcript_data.get('segments', [])
+        # Segments are parsed once and cached on the transcript row
+        segments = transcript.segments
         logger.info(f"Loaded transcript with {len(segments)} segments")
         
-        # Prepare for clips
-        clips = [video_clip]  # Start with base video
-        
         # Parse segments to ensure they fit on screen
         max_text_width = int(video_clip.w * 0.9)  # 90% of video width
         
@@ -189,56 +155,33 @@ async def _generate_enhanced_final_video(db: AsyncSession, filename: str) -> str
         parsed_captions = parse_segments(segments, fit_function)
         logger.info(f"Created {len(parsed_captions)} caption segments")
         
-        # Create caption clips
-        for caption in parsed_captions:
-            # Clean the text
-            text = caption["text"].strip().upper()
-            
-            # Create stylish caption with Bangers font
-            font_size = 80  # Bangers is a display font that looks good at this size
-            caption_clip = create_styled_caption(
-                text=text,
-                video_width=video_clip.w,
-                fontsize=font_size,
-                color="white",
-                stroke_color="black",
-                stroke_width=3,  # Slightly heavier stroke for Bangers
-                blur_shadow=True,
-                blur_radius=10  # Slightly increased shadow for better visibility
-            )
-            
-            # Position at bottom with 20% margin as requested
-            bottom_margin = video_clip.h * 0.20  # 20% margin from bottom (increased from 15%)
-            position = ("center", video_clip.h - bottom_margin)
-            
-            # Set timing and position
-            caption_clip = caption_clip.set_position(position)
-            caption_clip = caption_clip.set_start(caption["start"])
-            caption_clip = caption_clip.set_end(caption["end"])
-            
-            # Add to clip list
-            clips.append(caption_clip)
+        # Write captions as an ASS subtitle file so ffmpeg can burn them in natively
+        subtitles_path = os.path.join(temp_dir, "captions.ass")
+        _write_ass_subtitles(
+            parsed_captions,
+            subtitles_path,
+            video_width=video_clip.w,
+            video_height=video_clip.h,
+            fontsize=80,  # Bangers is a display font that looks good at this size
+            outline=3,  # Slightly heavier stroke for Bangers
+            shadow=10,
+            margin_v=int(video_clip.h * 0.20)  # 20% margin from bottom
+        )
         
-        # Generate B-roll clips if available
-        await _add_broll_clips(clips, segments, video_clip, temp_dir)
+        # Generate B-roll overlays if available
+        broll_overlays = []
+        await _add_broll_clips(broll_overlays, segments, video_clip, temp_dir)
         
-        # Create final composite
-        logger.info(f"Creating composite with {len(clips)} elements")
-        final_clip = CompositeVideoClip(clips)
+        # MoviePy was only needed for metadata; compositing happens in ffmpeg
+        video_clip.close()
         
         # Write to output file
         output_filename = f"final_{filename.replace('.webm', '.mp4')}"
         temp_output_path = os.path.join(temp_dir, output_filename)
-        logger.info(f"Writing final video to: {temp_output_path}")
+        logger.info(f"Writing final video with {len(parsed_captions)} captions and "
+                    f"{len(broll_overlays)} B-rolls to: {temp_output_path}")
         
-        final_clip.write_videofile(
-            temp_output_path,
-            codec='libx264',
-            audio_codec='aac',
-            preset='ultrafast',
-            threads=2,
-            fps=24
-        )
+        _render_final_video(temp_mp4_path, temp_output_path, subtitles_path, broll_overlays)
         
         # Upload to R2
         logger.info(f"Uploading final video to R2")
@@ -258,25 +201,20 @@ async def _generate_enhanced_final_video(db: AsyncSession, filename: str) -> str
         
         return final_url
 
-async def _add_broll_clips(clips: List, segments: List[Dict[str, Any]], video_clip, temp_dir: str) -> List:
+async def _add_broll_clips(overlays: List, segments: List[Dict[str, Any]], video_clip, temp_dir: str) -> List:
     """
-    Add B-roll clips to the video based on transcript content
+    Add B-roll overlays to the video based on transcript content
     
     Args:
-        clips: List of existing video clips
+        overlays: List of B-roll overlays to append to
         segments: Transcript segments with timestamps
         video_clip: Main video clip
         temp_dir: Temporary directory for processing
         
     Returns:
-        Updated list of clips with B-roll added
+        Updated list of overlays, each a dict with the image path, position and timing
+        consumed by _render_final_video
     """
-    # Import here to avoid circular imports
-    from moviepy.editor import ImageClip
-    from PIL import Image
-    import numpy as np
-    from .caption import fetch_b_roll
-    
     logger.info(f"Starting B-roll generation with {len(segments)} segments")
     
     # Instead of selecting specific segments, let's spread B-rolls throughout the video
@@ -378,95 +316,305 @@ async def _add_broll_clips(clips: List, segments: List[Dict[str, Any]], video_cl
     
     logger.info(f"Created {len(b_roll_segments)} B-roll segments at fixed time intervals")
     
-    # Process each B-roll segment - no hard limit, but we'll still have a maximum
-    max_added_brolls = 0
-    for i, segment in enumerate(b_roll_segments):
-        # Set a higher limit, but still have one to prevent issues
-        if max_added_brolls >= 20:
-            logger.info("Reached maximum B-roll limit (20), skipping remaining segments")
-            break
-            
-        try:
-            # Generate a clean prompt for B-roll generation
-            segment_text = segment.get('text', '').strip()
-            if not segment_text:
-                continue
-                
-            # Create a descriptive prompt for good B-roll generation
-            prompt = f"High quality visual scene representing: {segment_text[:100]}"
-            logger.info(f"Requesting B-roll for segment {i+1}/{len(b_roll_segments)}: {prompt}")
-            
-            # Request B-roll from DALL-E 3
-            broll_url = await fetch_b_roll(prompt)
-            if not broll_url:
-                logger.warning(f"B-roll generation failed for segment {i+1}, skipping")
-                continue
-            
-            # Download the B-roll image
-            import requests
-            image_path = os.path.join(temp_dir, f"broll_{i}.png")
+    # Reuse one HTTP session so the B-roll downloads share keep-alive connections
+    with requests.Session() as http_session:
+        # Process each B-roll segment - no hard limit, but we'll still have a maximum
+        max_added_brolls = 0
+        for i, segment in enumerate(b_roll_segments):
+            # Set a higher limit, but still have one to prevent issues
+            if max_added_brolls >= 20:
+                logger.info("Reached maximum B-roll limit (20), skipping remaining segments")
+                break
             
             try:
-                response = requests.get(broll_url, stream=True, timeout=10)  # Add timeout
-                if response.status_code == 200:
-                    with open(image_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):  # Use iter_content for safety
-                            if chunk:
-                                f.write(chunk)
-                else:
-                    logger.warning(f"Failed to download B-roll image: HTTP {response.status_code}")
+                # Generate a clean prompt for B-roll generation
+                segment_text = segment.get('text', '').strip()
+                if not segment_text:
                     continue
-            except Exception as download_err:
-                logger.error(f"Error downloading B-roll image: {download_err}")
-                continue
+                
+                # Create a descriptive prompt for good B-roll generation
+                prompt = f"High quality visual scene representing: {segment_text[:100]}"
+                logger.info(f"Requesting B-roll for segment {i+1}/{len(b_roll_segments)}: {prompt}")
             
-            # Load and resize image for B-roll
-            broll_img = Image.open(image_path)
+                # Request B-roll from DALL-E 3
+                broll_url = await fetch_b_roll(prompt)
+                if not broll_url:
+                    logger.warning(f"B-roll generation failed for segment {i+1}, skipping")
+                    continue
             
-            # Calculate dimensions - make it 70% of video width
-            new_width = int(video_clip.w * 0.7)
-            ratio = broll_img.width / broll_img.height
-            new_height = int(new_width / ratio)
+                # Download the B-roll image off the event loop
+                image_path = os.path.join(temp_dir, f"broll_{i}.png")
             
-            # Resize image
-            broll_img = broll_img.resize((new_width, new_height), Image.LANCZOS)
+                try:
+                    downloaded = await asyncio.to_thread(_download_broll, http_session, broll_url, image_path)
+                except Exception as download_err:
+                    logger.error(f"Error downloading B-roll image: {download_err}")
+                    continue
+                if not downloaded:
+                    continue
             
-            # Convert to numpy array for MoviePy
-            img_array = np.array(broll_img)
+                # Calculate dimensions - make it 70% of video width
+                new_width = int(video_clip.w * 0.7)
             
-            # Create clip
-            broll_clip = ImageClip(img_array)
+                # Resize off the event loop (PIL releases the GIL while resampling)
+                resized_path = await asyncio.to_thread(_prepare_broll, image_path, new_width)
             
-            # Position at top center of frame
-            position = ((video_clip.w - new_width) / 2, video_clip.h * 0.20)
+                # Position at top center of frame
+                position = (int((video_clip.w - new_width) / 2), int(video_clip.h * 0.20))
             
-            # Display B-roll for a fixed duration of 3 seconds regardless of segment length
-            # This ensures consistent B-roll display even for short segments
-            segment_start = segment.get('start', 0)
-            segment_end = segment.get('end', 0)
-            segment_duration = segment_end - segment_start
+                # Display B-roll for a fixed duration of 3 seconds regardless of segment length
+                # This ensures consistent B-roll display even for short segments
+                segment_start = segment.get('start', 0)
+                segment_end = segment.get('end', 0)
+                segment_duration = segment_end - segment_start
             
-            # Always show B-roll for 3 seconds, but ensure it doesn't start before first_broll_time
-            # If segment is shorter than 3 seconds, B-roll will still show for 3 seconds
-            start_time = max(segment_start, first_broll_time)  # Ensure B-roll never starts before first_broll_time
-            duration = 3.0  # Fixed 3 second duration for consistency
-            end_time = start_time + duration
+                # Always show B-roll for 3 seconds, but ensure it doesn't start before first_broll_time
+                # If segment is shorter than 3 seconds, B-roll will still show for 3 seconds
+                start_time = max(segment_start, first_broll_time)  # Ensure B-roll never starts before first_broll_time
+                duration = 3.0  # Fixed 3 second duration for consistency
+                end_time = start_time + duration
             
-            # Add fade effects
-            fade_duration = 0.5
-            broll_clip = broll_clip.set_position(position).set_start(start_time).set_end(end_time)
+                # Add fades if there's enough duration
+                fade_duration = 0.5
+                if duration <= 2 * fade_duration:
+                    fade_duration = 0
             
-            # Add fades if there's enough duration
-            if duration > 2 * fade_duration:
-                broll_clip = broll_clip.fadein(fade_duration).fadeout(fade_duration)
+                # Add to overlay list
+                overlays.append({
+                    "path": resized_path,
+                    "position": position,
+                    "start": start_time,
+                    "end": end_time,
+                    "fade": fade_duration,
+                })
+                max_added_brolls += 1
+                logger.info(f"Added B-roll clip {max_added_brolls}/{max_b_rolls} at time {start_time:.2f}s")
+        
+            except Exception as e:
+                logger.error(f"Error adding B-roll: {e}", exc_info=True)
+                continue
             
-            # Add to clip list
-            clips.append(broll_clip)
-            max_added_brolls += 1
-            logger.info(f"Added B-roll clip {max_added_brolls}/{max_b_rolls} at time {start_time:.2f}s")
+    return overlays
+
+def _download_broll(http_session, url: str, image_path: str) -> bool:
+    """
+    Download a B-roll image to disk using a shared requests session
+    
+    Args:
+        http_session: requests.Session reused across downloads for connection keep-alive
+        url: URL of the B-roll image
+        image_path: Where to save the image
         
-        except Exception as e:
-            logger.error(f"Error adding B-roll: {e}", exc_info=True)
+    Returns:
+        True if the image was downloaded
+    """
+    with http_session.get(url, stream=True, timeout=10) as response:
+        if response.status_code != 200:
+            logger.warning(f"Failed to download B-roll image: HTTP {response.status_code}")
+            return False
+        
+        with open(image_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=8192):  # Use iter_content for safety
+                if chunk:
+                    f.write(chunk)
+    
+    return True
+
+def _prepare_broll(image_path: str, target_width: int) -> str:
+    """
+    Load a B-roll image and save a copy resized to the target width
+    
+    Runs in a worker thread via asyncio.to_thread so the resize does not block the event loop.
+    
+    Args:
+        image_path: Path to the downloaded B-roll image
+        target_width: Desired width in pixels (height keeps the aspect ratio)
+        
+    Returns:
+        Path to the resized PNG image
+    """
+    with Image.open(image_path) as broll_img:
+        ratio = broll_img.width / broll_img.height
+        target_height = int(target_width / ratio)
+        broll_img = broll_img.resize((target_width, target_height), Image.LANCZOS)
+    
+    resized_path = f"{os.path.splitext(image_path)[0]}_resized.png"
+    broll_img.save(resized_path, format="PNG")
+    return resized_path
+
+def _ass_timestamp(seconds: float) -> str:
+    """Format seconds as an ASS timestamp (H:MM:SS.cc)"""
+    centiseconds = int(round(max(seconds, 0) * 100))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+def _write_ass_subtitles(
+    captions: List[Dict[str, Any]],
+    output_path: str,
+    video_width: int,
+    video_height: int,
+    fontsize: int = 80,
+    outline: int = 3,
+    shadow: int = 10,
+    margin_v: int = 0
+) -> str:
+    """
+    Write parsed captions to an ASS subtitle file styled like our PIL captions
+    
+    Args:
+        captions: Parsed captions with text and start/end times
+        output_path: Path of the .ass file to write
+        video_width: Width of the video frame in pixels
+        video_height: Height of the video frame in pixels
+        fontsize: Font size for text
+        outline: Outline width
+        shadow: Shadow depth
+        margin_v: Margin from the bottom of the frame in pixels
+        
+    Returns:
+        Path to the written subtitle file
+    """
+    # Use the family name of the caption font so libass can find it in the fonts dir
+    font_name = _get_font(FONT_PATH, fontsize).getname()[0] if FONT_PATH else "Arial"
+    
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {video_width}",
+        f"PlayResY: {video_height}",
+        "WrapStyle: 2",  # The segment parser already fits lines to the frame
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: Caption,{font_name},{fontsize},&H00FFFFFF,&H00FFFFFF,&H00000000,&H37000000,"
+        f"0,0,0,0,100,100,0,0,1,{outline},{shadow},2,0,0,{margin_v},1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    
+    for caption in captions:
+        # Clean the text; braces and backslashes would be read as ASS override tags
+        text = caption["text"].strip().upper()
+        text = text.replace("{", "(").replace("}", ")").replace("\\", "/")
+        lines.append(
+            f"Dialogue: 0,{_ass_timestamp(caption['start'])},{_ass_timestamp(caption['end'])},"
+            f"Caption,,0,0,0,,{text}"
+        )
+    
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    
+    return output_path
+
+def _render_final_video(input_path: str, output_path: str, subtitles_path: str, overlays: List[Dict[str, Any]]) -> str:
+    """
+    Burn captions and B-roll overlays into the video with a single ffmpeg pass
+    
+    Args:
+        input_path: Path to the source MP4 video
+        output_path: Path for the final video
+        subtitles_path: Path to the ASS captions file
+        overlays: B-roll overlays produced by _add_broll_clips
+        
+    Returns:
+        Path to the final video
+    """
+    fonts_dir = os.path.dirname(FONT_PATH) if FONT_PATH else None
+    subtitles_filter = f"ass='{subtitles_path}'"
+    if fonts_dir:
+        subtitles_filter += f":fontsdir='{fonts_dir}'"
+    
+    inputs = ["-i", input_path]
+    filters = [f"[0:v]{subtitles_filter}[v0]"]
+    
+    for i, overlay in enumerate(overlays, start=1):
+        start, end, fade = overlay["start"], overlay["end"], overlay["fade"]
+        x, y = overlay["position"]
+        
+        # Loop the still image for the display duration, then shift it to its start time
+        inputs += ["-loop", "1", "-framerate", "24", "-t", f"{end - start:.3f}", "-i", overlay["path"]]
+        broll_filter = f"[{i}:v]format=rgba"
+        if fade:
+            broll_filter += (f",fade=t=in:st=0:d={fade}:alpha=1"
+                             f",fade=t=out:st={end - start - fade:.3f}:d={fade}:alpha=1")
+        broll_filter += f",setpts=PTS-STARTPTS+{start:.3f}/TB[b{i}]"
+        filters.append(broll_filter)
+        filters.append(
+            f"[v{i - 1}][b{i}]overlay=x={x}:y={y}:eof_action=pass"
+            f":enable='between(t,{start:.3f},{end:.3f})'[v{i}]"
+        )
+    
+    ffmpeg_cmd = [
+        "ffmpeg", "-y", *inputs,
+        "-filter_complex", ";".join(filters),
+        "-map", f"[v{len(overlays)}]", "-map", "0:a?",
+        *_video_codec_args(["-preset", "faster", "-crf", "23", "-pix_fmt", "yuv420p"]),
+        "-r", "24",
+        "-c:a", "copy",
+        output_path
+    ]
+    
+    try:
+        subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
+        logger.info(f"Rendered final video with ffmpeg: {output_path}")
+    except subprocess.CalledProcessError as e:
+        logger.error(f"FFmpeg render error: {e.stderr.decode() if e.stderr else str(e)}")
+        raise Exception(f"Failed to render final video: {str(e)}")
+    
+    return output_path
+
+@lru_cache(maxsize=1)
+def _detect_hw_encoder() -> Optional[str]:
+    """
+    Find a working hardware H.264 encoder, checked once per process
+    
+    Returns:
+        Name of the first usable encoder in HW_ENCODERS, or None
+    """
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            check=True, capture_output=True, text=True
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.warning(f"Could not list ffmpeg encoders: {e}")
+        return None
+    
+    for encoder, encoder_args in HW_ENCODERS.items():
+        if encoder not in result.stdout:
             continue
-            
-    return clips
\ No newline at end of file
+        
+        # Static ffmpeg builds list encoders whose hardware is missing, so try a tiny encode
+        probe = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-f", "lavfi", "-i", "color=size=256x256:duration=0.1",
+             "-c:v", encoder, *encoder_args, "-f", "null", "-"],
+            capture_output=True
+        )
+        if probe.returncode == 0:
+            logger.info(f"Using hardware video encoder: {encoder}")
+            return encoder
+    
+    logger.info("No hardware video encoder available, using libx264")
+    return None
+
+def _video_codec_args(software_args: List[str]) -> List[str]:
+    """
+    Build the ffmpeg video codec arguments
+    
+    Args:
+        software_args: Extra arguments to use with libx264
+        
+    Returns:
+        Codec arguments for the hardware encoder when VIDEO_HW_ACCEL is enabled and
+        one is available, otherwise for libx264
+    """
+    encoder = _detect_hw_encoder() if settings.VIDEO_HW_ACCEL else None
+    if encoder:
+        return ["-c:v", encoder, *HW_ENCODERS[encoder]]
+    return ["-c:v", "libx264", *software_args]
@@ -7,18 +7,27 @@ import tempfile
 import logging
 import json
 
+import numpy as np
+
 from app.services.aws_ai_services import aws_ai_services
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# ffmpeg codec settings per output format; 24 kbps Opus is ~20x smaller than 16 kHz PCM WAV
+AUDIO_CODECS = {
+    ".ogg": ["-c:a", "libopus", "-b:a", "24k"],
+    ".wav": ["-c:a", "pcm_s16le"],
+}
+
 def extract_audio(video_path, output_path=None):
     """
     Extract audio from video file using ffmpeg
     
     Args:
         video_path: Path to video file
-        output_path: Optional path for output audio (defaults to temp file)
+        output_path: Optional path for output audio (defaults to temp .ogg file).
+            The extension picks the codec: .ogg for Opus, .wav for PCM
         
     Returns:
         Path to extracted audio file
@@ -26,7 +35,9 @@ def extract_audio(video_path, output_path=None):
     import subprocess
     
     if output_path is None:
-        output_path = tempfile.NamedTemporaryFile(suffix=".wav", delete=False).name
+        output_path = tempfile.NamedTemporaryFile(suffix=".ogg", delete=False).name
+    
+    codec_args = AUDIO_CODECS.get(os.path.splitext(output_path)[1].lower(), AUDIO_CODECS[".ogg"])
     
     try:
         subprocess.run([
@@ -34,7 +45,7 @@ def extract_audio(video_path, output_path=None):
             '-y',              # Overwrite output file if it exists
             '-i', video_path,  # Input video
             '-vn',             # Disable video
-            '-acodec', 'pcm_s16le',  # Audio codec
+            *codec_args,       # Audio codec
             '-ar', '16000',    # Sample rate
             '-ac', '1',        # Mono audio
             output_path        # Output path
@@ -94,19 +105,13 @@ def format_transcript_for_captions(segments):
             # Create a synthetic word list if needed
             if "words" not in segment:
                 words = segment["text"].split()
-                duration_per_word = (segment["end"] - segment["start"]) / len(words)
-                
-                segment_words = []
-                for i, word in enumerate(words):
-                    word_start = segment["start"] + (i * duration_per_word)
-                    word_end = word_start + duration_per_word
-                    segment_words.append({
-                        "word": f" {word}",  # Add space prefix
-                        "start": word_start,
-                        "end": word_end
-                    })
                 
-                segment["words"] = segment_words
+                # Spread the words evenly across the segment: word i spans edges[i]..edges[i+1]
+                edges = np.linspace(segment["start"], segment["end"], len(words) + 1).tolist()
+                segment["words"] = [
+                    {"word": f" {word}", "start": edges[i], "end": edges[i + 1]}  # Add space prefix
+                    for i, word in enumerate(words)
+                ]
             
             simplified_segments.append(segment)
         return simplified_segments
@@ -1,7 +1,7 @@
 import boto3
 from app.core.config import settings
 import logging
-from io import BytesIO
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -30,22 +30,24 @@ s3 = session.client(
 )
 BUCKET = settings.R2_BUCKET
 
+# Base URL for objects addressed through the R2 endpoint
+# Cloudflare R2 URL format might be https://<id>.r2.cloudflarestorage.com/<bucket>
+# or might end with the bucket name already
+if BUCKET in settings.R2_ENDPOINT:
+    R2_BASE_URL = settings.R2_ENDPOINT.rstrip("/")
+else:
+    R2_BASE_URL = f"{settings.R2_ENDPOINT.rstrip('/')}/{BUCKET}"
+
 # Log connection info
 logger.info(f"Initialized R2 client with endpoint: {settings.R2_ENDPOINT} and bucket: {BUCKET}")
 
 def upload_fileobj(fileobj, key: str, content_type: str = None) -> str:
     """
     Upload a file object to R2 storage
-    """
-    # First, read the fileobj contents
-    try:
-        contents = fileobj.read()
-        # Reset the file pointer in case we need to reuse it
-        fileobj.seek(0)
-    except Exception as e:
-        logger.error(f"Failed to read file contents: {e}")
-        raise
     
+    The file object is streamed by boto3 (multipart for large files), so it is
+    never read fully into memory.
+    """
     try:
         logger.info(f"Uploading file to R2 bucket: {BUCKET}, key: {key}")
         
@@ -54,20 +56,11 @@ def upload_fileobj(fileobj, key: str, content_type: str = None) -> str:
         if content_type:
             extra_args["ContentType"] = content_type
         
-        # Create a BytesIO object from contents for upload
-        stream = BytesIO(contents)
-        
         # Upload to R2
-        s3.upload_fileobj(stream, BUCKET, key, ExtraArgs=extra_args)
+        s3.upload_fileobj(fileobj, BUCKET, key, ExtraArgs=extra_args)
+        _cache_exists(key, True)
         
-        # Generate the correct public URL based on endpoint format
-        # Cloudflare R2 URL format might be https://<id>.r2.cloudflarestorage.com/<bucket>
-        # or might end with the bucket name already
-        if BUCKET in settings.R2_ENDPOINT:
-            url = f"{settings.R2_ENDPOINT}/{key}"
-        else:
-            url = f"{settings.R2_ENDPOINT}/{BUCKET}/{key}"
-            
+        url = f"{R2_BASE_URL}/{key}"
         logger.info(f"File uploaded to R2 successfully: {url}")
         return url
     except Exception as e:
@@ -80,6 +73,7 @@ public_access_allowed = True
 
 # Cloudflare public URL domain (adjust as needed based on your specific R2 setup)
 CLOUDFLARE_PUBLIC_URL = "https://pub-f7fdd9a323df414ba0d52f4474f6f12f.r2.dev"
+PUBLIC_BASE_URL = CLOUDFLARE_PUBLIC_URL.rstrip("/")
 
 def get_file_url(key: str, use_api_proxy: bool = False):
     """
@@ -94,41 +88,74 @@ def get_file_url(key: str, use_api_proxy: bool = False):
     """
     # If public access is allowed and we don't explicitly request API proxy, use Cloudflare public URL
     if public_access_allowed and not use_api_proxy:
-        # Use the direct Cloudflare public URL
-        return f"{CLOUDFLARE_PUBLIC_URL}/{key}"
-    else:
-        # Use API proxy (for local dev or when direct access is not allowed)
-        if key.startswith("final/"):
-            # For final videos, use our streaming API endpoint with the original filename
-            # Extract original filename from the final/final_FILENAME.mp4 key format
-            # The format is "final/final_originalname.mp4"
-            try:
-                original_filename = key.split("final_")[1].split(".mp4")[0] + ".webm"
-                return f"/api/stream_final_video/{original_filename}"
-            except Exception as e:
-                logger.error(f"Error extracting original filename from key {key}: {e}")
-                # Fall back to standard URL format
-                pass
-                
-        # For other files or if filename extraction fails, generate the standard R2 URL
-        if BUCKET in settings.R2_ENDPOINT:
-            return f"{settings.R2_ENDPOINT}/{key}"
-        else:
-            return f"{settings.R2_ENDPOINT}/{BUCKET}/{key}"
+        return f"{PUBLIC_BASE_URL}/{key}"
+    
+    # Use API proxy (for local dev or when direct access is not allowed)
+    if key.startswith("final/"):
+        # For final videos, use our streaming API endpoint with the original filename
+        # Extract original filename from the final/final_FILENAME.mp4 key format
+        _, found, original_name = key.partition("final_")
+        if found:
+            return f"/api/stream_final_video/{original_name.partition('.mp4')[0]}.webm"
+        logger.error(f"Error extracting original filename from key {key}")
+    
+    # For other files or if filename extraction fails, generate the standard R2 URL
+    return f"{R2_BASE_URL}/{key}"
+
+# Short-lived cache of existence checks so repeated probes skip the HEAD round trip
+EXISTS_CACHE_TTL = 60  # seconds
+EXISTS_CACHE_MAX_SIZE = 10_000
+_exists_cache = {}  # key -> (exists, expires_at)
+
+def _cache_exists(key: str, exists: bool):
+    """Record whether a key exists in R2"""
+    if len(_exists_cache) >= EXISTS_CACHE_MAX_SIZE:
+        _exists_cache.clear()
+    _exists_cache[key] = (exists, time.monotonic() + EXISTS_CACHE_TTL)
+
+def invalidate_exists(key: str):
+    """Drop any cached existence result for a key, e.g. after deleting it"""
+    _exists_cache.pop(key, None)
 
 def file_exists(key: str) -> bool:
     """
     Check if a file exists in R2 storage
     """
+    cached = _exists_cache.get(key)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+    
     try:
         s3.head_object(Bucket=BUCKET, Key=key)
+        _cache_exists(key, True)
         return True
     except Exception as e:
         # Check if it's a 404 (NoSuchKey or Not Found) error
         error_message = str(e)
         if "404" in error_message or "NoSuchKey" in error_message:
+            _cache_exists(key, False)
             return False
         
         # Log other errors but don't block the flow
         logger.error(f"Error checking if file exists in R2: {e}")
         return False
+
+def warm_prefix(prefix: str) -> int:
+    """
+    Prefetch the keys under a prefix into the existence cache with a single listing
+    
+    Args:
+        prefix: Key prefix to list, e.g. "final/"
+    
+    Returns:
+        Number of keys cached
+    """
+    count = 0
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=BUCKET, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            _cache_exists(obj["Key"], True)
+            count += 1
+    
+    logger.info(f"Cached {count} R2 keys under prefix: {prefix}")
+    return count
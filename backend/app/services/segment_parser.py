@@ -4,17 +4,36 @@ Optimized for generating clean, readable captions
 """
 
 import logging
+import re
 from typing import List, Dict, Any, Callable
 
+import numpy as np
+
+# numba is not a declared dependency: unless it is installed, the
+# calculate_display_time kernel runs as plain Python
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 logger = logging.getLogger(__name__)
 
+# Last sentence-ending character in a string ('...' is covered by '.')
+_SENT_END_RE = re.compile(r"[.!?:;][^.!?:;]*\Z")
+
+def _last_sentence_end(text):
+    """
+    Return the index of the last sentence-ending character in text, or -1
+    """
+    m = _SENT_END_RE.search(text)
+    return m.start() if m else -1
+
 def has_partial_sentence(text):
     """
     Check if the text ends with a partial sentence (e.g., ends after a period in the middle)
     """
     # Determine if text ends naturally or needs continuation
-    sentence_enders = ('.', '!', '?', ':', '...', ';')
-    last_sentence_end = max(text.rfind(end) for end in sentence_enders)
+    last_sentence_end = _last_sentence_end(text)
     
     # If we found a sentence ender and it's not at the end, 
     # then we have partial sentence
@@ -43,7 +62,8 @@ def parse(
         List of caption objects with start/end times and text
     """
     captions = []
-    current_caption = ""
+    current_words = []  # Words of the caption being built; joined only when needed
+    last_sent_end_idx = -1  # Index of the last sentence ender in the joined caption
     current_start = 0
     current_end = 0
     
@@ -56,11 +76,20 @@ def parse(
         # If segment has words with timestamps, use those for fine-grained captions
         words = segment.get('words', [])
         
+        if not words:
+            # Segment doesn't have individual words, spread its text evenly
+            # over the segment and handle it like any other
+            parts = segment_text.split()
+            step = (segment_end - segment_start) / max(1, len(parts))
+            words = [
+                {"text": w, "start": segment_start + i * step, "end": segment_start + (i + 1) * step}
+                for i, w in enumerate(parts)
+            ]
+        
         if words:
             # Start a new caption if none exists
-            if not current_caption:
+            if not current_words:
                 current_start = words[0].get('start', segment_start)
-                current_caption = ""
             
             # Process each word 
             for word_idx, word in enumerate(words):
@@ -73,38 +102,50 @@ def parse(
                     continue
                 
                 # Test if adding this word would make the caption too long
-                test_caption = current_caption + (" " if current_caption else "") + word_text
+                test_caption = " ".join(current_words + [word_text])
                 
                 if fit_function(test_caption):
                     # Word fits, add it to current caption
-                    current_caption = test_caption
+                    word_sent_end = _last_sentence_end(word_text)
+                    if word_sent_end >= 0:
+                        last_sent_end_idx = len(test_caption) - len(word_text) + word_sent_end
+                    current_words.append(word_text)
                     current_end = word_end
                 else:
                     # Word doesn't fit, start a new caption
+                    current_caption = " ".join(current_words)
                     
                     # Before creating a new caption, check if we're breaking at a sentence boundary
-                    if not allow_partial_sentences and has_partial_sentence(current_caption):
-                        # Find a better break point - go back to last sentence end
-                        sentence_enders = ('.', '!', '?', ':', '...', ';')
-                        last_sentence_end = max(current_caption.rfind(end) for end in sentence_enders)
+                    # (same test as has_partial_sentence, using the tracked sentence end)
+                    last_sentence_end = last_sent_end_idx
+                    if (not allow_partial_sentences
+                            and 0 < last_sentence_end < len(current_caption) - 1
+                            and len(current_caption[last_sentence_end+1:].strip()) > 3):
+                        # Split the caption at sentence end
+                        part1 = current_caption[:last_sentence_end+1].strip()
+                        part2 = current_caption[last_sentence_end+1:].strip()
+                        
+                        # Split the caption's time span in proportion to its characters
+                        split_ratio = (last_sentence_end + 1) / len(current_caption)
+                        split_time = current_start + (current_end - current_start) * split_ratio
                         
-                        if last_sentence_end > 0:
-                            # Split the caption at sentence end
-                            part1 = current_caption[:last_sentence_end+1].strip()
-                            part2 = current_caption[last_sentence_end+1:].strip()
-                            
-                            # Add first part as a caption
-                            captions.append({
-                                "text": part1,
-                                "start": current_start,
-                                "end": current_end - len(part2) * 0.1  # Approximate time adjustment
-                            })
-                            
-                            # Start a new caption with the remainder
-                            current_caption = part2 + (" " if part2 else "") + word_text
-                            current_start = current_end - len(part2) * 0.1
-                            current_end = word_end
-                            continue
+                        # Add first part as a caption
+                        captions.append({
+                            "text": part1,
+                            "start": current_start,
+                            "end": split_time
+                        })
+                        
+                        # Start a new caption with the remainder; part2 has no sentence
+                        # enders, so only the new word can contribute one
+                        current_words = part2.split() + [word_text]
+                        word_sent_end = _last_sentence_end(word_text)
+                        last_sent_end_idx = -1
+                        if word_sent_end >= 0:
+                            last_sent_end_idx = len(" ".join(current_words)) - len(word_text) + word_sent_end
+                        current_start = split_time
+                        current_end = word_end
+                        continue
                     
                     # Add the current caption
                     if current_caption:
@@ -115,60 +156,15 @@ def parse(
                         })
                     
                     # Start a new caption with this word
-                    current_caption = word_text
+                    current_words = [word_text]
+                    last_sent_end_idx = _last_sentence_end(word_text)
                     current_start = word_start
                     current_end = word_end
-        else:
-            # Segment doesn't have individual words, use whole segment
-            # Only use if segment_text fits on screen
-            if fit_function(segment_text):
-                captions.append({
-                    "text": segment_text,
-                    "start": segment_start,
-                    "end": segment_end
-                })
-            else:
-                # Split long segment text into smaller parts
-                words = segment_text.split()
-                current_line = ""
-                start_idx = 0
-                
-                for idx, word in enumerate(words):
-                    test_line = current_line + (" " if current_line else "") + word
-                    
-                    if fit_function(test_line):
-                        current_line = test_line
-                    else:
-                        # Add current line as caption
-                        if current_line:
-                            # Calculate approximate times based on word positions
-                            line_start = segment_start + (segment_end - segment_start) * (start_idx / len(words))
-                            line_end = segment_start + (segment_end - segment_start) * (idx / len(words))
-                            
-                            captions.append({
-                                "text": current_line,
-                                "start": line_start,
-                                "end": line_end
-                            })
-                        
-                        # Start new line
-                        current_line = word
-                        start_idx = idx
-                
-                # Add final line if any
-                if current_line:
-                    line_start = segment_start + (segment_end - segment_start) * (start_idx / len(words))
-                    
-                    captions.append({
-                        "text": current_line,
-                        "start": line_start,
-                        "end": segment_end
-                    })
     
     # Add any remaining caption
-    if current_caption:
+    if current_words:
         captions.append({
-            "text": current_caption,
+            "text": " ".join(current_words),
             "start": current_start,
             "end": current_end
         })
@@ -178,6 +174,20 @@ def parse(
     
     return captions
 
+def _adjust_ends(text_lens, starts, ends, min_d, max_d, cps):
+    """Array kernel for calculate_display_time; updates ends in place"""
+    n = len(ends)
+    for i in range(n):
+        desired = max(min_d, min(text_lens[i] / cps, max_d))
+        if ends[i] - starts[i] < desired:
+            new_end = starts[i] + desired
+            if i < n - 1:
+                new_end = min(new_end, starts[i + 1] - 0.1)
+            ends[i] = new_end
+
+# Compiled kernel, used by calculate_display_time when numba is available
+_adjust_ends_jit = njit(cache=True)(_adjust_ends) if njit is not None else None
+
 def calculate_display_time(captions, min_duration=1.0, max_duration=5.0, 
                          chars_per_second=15):
     """
@@ -192,6 +202,16 @@ def calculate_display_time(captions, min_duration=1.0, max_duration=5.0,
     Returns:
         The same captions with adjusted end times if needed
     """
+    if _adjust_ends_jit is not None and captions:
+        text_lens = np.asarray([len(c["text"]) for c in captions], dtype=np.float64)
+        starts = np.asarray([c["start"] for c in captions], dtype=np.float64)
+        ends = np.asarray([c["end"] for c in captions], dtype=np.float64)
+        _adjust_ends_jit(text_lens, starts, ends, float(min_duration),
+                         float(max_duration), float(chars_per_second))
+        for caption, end in zip(captions, ends.tolist()):
+            caption["end"] = end
+        return captions
+    
     for i, caption in enumerate(captions):
         # Calculate minimum required duration based on text length
         text_length = len(caption["text"])
@@ -1,7 +1,6 @@
 import logging
 import os
 import uuid
-from io import BytesIO
 from app.services.r2 import upload_fileobj, get_file_url, file_exists as r2_file_exists
 
 logger = logging.getLogger(__name__)
@@ -25,14 +24,16 @@ async def save_upload_file(upload_file):
         
         logger.info(f"Processing file upload: {key}, content type: {upload_file.content_type}")
         
-        # Read the file content
-        file_content = await upload_file.read()
-        if not file_content:
+        # Stream the underlying spooled file instead of reading it into memory
+        fileobj = upload_file.file
+        size = upload_file.size
+        if size is None:
+            # Seek rather than fstat: fileno() forces an in-memory spool to disk
+            size = fileobj.seek(0, os.SEEK_END)
+        if not size:
             logger.error("Empty file content")
             raise ValueError("Empty file content")
-            
-        # Create a BytesIO object from file content
-        fileobj = BytesIO(file_content)
+        fileobj.seek(0)
         
         # Upload to R2
         url = upload_fileobj(fileobj, key, content_type=upload_file.content_type)
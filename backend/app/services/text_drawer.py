@@ -4,6 +4,8 @@ Advanced text rendering with outline and shadow effects
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from moviepy.editor import TextClip
 import numpy as np
 from PIL import Image, ImageDraw, ImageFilter, ImageFont
@@ -19,6 +21,10 @@ if not os.path.exists(FONT_PATH):
         # Fallback to system font
         FONT_PATH = None
 
+# Pre-rasterized word masks keyed by (word, fontsize, font_path, stroke_width)
+WORD_GLYPH_CACHE_MAX_SIZE = 4096
+_WORD_GLYPH_CACHE = {}
+
 def create_styled_caption(
     text: str,
     video_width: int,
@@ -47,11 +53,72 @@ def create_styled_caption(
     Returns:
         MoviePy TextClip for the styled caption
     """
+    # Render the caption image with PIL (for better control over styling)
+    img_array = _render_caption_array(
+        text, video_width, fontsize, font_path, color,
+        stroke_color, stroke_width, blur_shadow, blur_radius
+    )
+    
+    # Instead of using TextClip with a function, we'll use different approach
+    # This avoids the "a bytes-like object is required, not 'function'" error
+    from moviepy.editor import ImageClip
+    
+    # Create an ImageClip from our rendered image array
+    clip = ImageClip(img_array)
+    # Make it last for 1 second (will be overridden when setting start/end times)
+    clip = clip.set_duration(1)
+    
+    return clip
+
+def create_styled_captions(texts, video_width: int, **kwargs) -> list:
+    """
+    Create styled captions for many texts, rendering them in parallel
+    
+    Pillow releases the GIL while blurring, so the renders overlap across
+    threads. Repeated texts are rendered once.
+    
+    Args:
+        texts: Caption texts to render
+        video_width: Width of the video frame in pixels
+        **kwargs: Styling options accepted by create_styled_caption
+        
+    Returns:
+        List of MoviePy clips, one per text, in the same order
+    """
+    from moviepy.editor import ImageClip
+    
+    unique_texts = list(dict.fromkeys(texts))
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        arrays = dict(zip(unique_texts, executor.map(
+            lambda text: _render_caption_array(text, video_width, **kwargs),
+            unique_texts
+        )))
+    
+    return [ImageClip(arrays[text]).set_duration(1) for text in texts]
+
+@lru_cache(maxsize=512)
+def _render_caption_array(
+    text: str,
+    video_width: int,
+    fontsize: int = 80,
+    font_path: str = FONT_PATH,
+    color: str = "white",
+    stroke_color: str = "black",
+    stroke_width: int = 2,
+    blur_shadow: bool = True,
+    blur_radius: int = 8
+) -> np.ndarray:
+    """
+    Render a styled caption to a read-only RGBA numpy array
+    
+    Takes the same arguments as create_styled_caption. Results are cached, so
+    repeated captions share one read-only array between their clips.
+    """
     # Handle empty text
     if not text:
         text = " "  # Use a space rather than empty string
     
-    # Create image with PIL (for better control over styling)
+    # Create image with PIL
     font = _get_font(font_path, fontsize)
     text_size = _get_text_size(text, font)
     
@@ -63,52 +130,137 @@ def create_styled_caption(
                    (text_size[0] + padding * 2, text_size[1] + padding * 2), 
                    (0, 0, 0, 0))
     
-    # Add shadow if requested
+    # Add shadow if requested; the canvas is still transparent black, so the
+    # shadow is just its alpha
     if blur_shadow:
-        shadow_img = Image.new('RGBA', img.size, (0, 0, 0, 0))
-        shadow_draw = ImageDraw.Draw(shadow_img)
-        shadow_draw.text((padding, padding), text, font=font, fill=(0, 0, 0, 200))
-        
-        # Apply blur to shadow
-        shadow_img = shadow_img.filter(ImageFilter.GaussianBlur(radius=blur_radius))
+        img.putalpha(_render_shadow(text, font_path, fontsize, blur_radius, padding))
+    
+    # Draw main text from pre-rasterized words where possible
+    if not _composite_words(img, (padding, padding), text, font, font_path, fontsize,
+                            color, stroke_color, stroke_width):
+        draw = ImageDraw.Draw(img)
         
-        # Paste shadow onto main image
-        img.paste(shadow_img, (0, 0), shadow_img)
+        # Draw main text, with Pillow rasterizing the outline in the same pass
+        if stroke_width > 0 and stroke_color:
+            draw.text((padding, padding), text, font=font, fill=color,
+                      stroke_width=stroke_width, stroke_fill=stroke_color)
+        else:
+            draw.text((padding, padding), text, font=font, fill=color)
     
-    # Draw text outline
-    draw = ImageDraw.Draw(img)
+    # Convert to numpy array for MoviePy; asarray wraps Pillow's buffer export
+    # without a second copy, and the result is read-only as the cache requires
+    img_array = np.asarray(img)
+    img_array.flags.writeable = False
     
-    # Draw text outline by rendering text multiple times with small offsets
-    if stroke_width > 0 and stroke_color:
-        for offset_x, offset_y in _get_outline_offsets(stroke_width):
-            draw.text((padding + offset_x, padding + offset_y), 
-                     text, font=font, fill=stroke_color)
+    return img_array
+
+def _composite_words(
+    img: Image,
+    xy: tuple,
+    text: str,
+    font: ImageFont,
+    font_path: str,
+    fontsize: int,
+    color: str,
+    stroke_color: str,
+    stroke_width: int
+) -> bool:
+    """
+    Draw text onto img from cached per-word coverage masks
     
-    # Draw main text
-    draw.text((padding, padding), text, font=font, fill=color)
+    Common words recur across many captions, so each word is rasterized once
+    and its masks are reused. Word positions come from the font's layout of
+    the preceding text, and the masks are filled the same way Pillow fills
+    glyphs, so the result matches drawing the whole string.
     
-    # Convert to numpy array for MoviePy
-    img_array = np.array(img)
+    Returns:
+        False if the font is not a FreeType font, in which case nothing is drawn
+    """
+    if not isinstance(font, ImageFont.FreeTypeFont):
+        return False
     
-    # Instead of using TextClip with a function, we'll use different approach
-    # This avoids the "a bytes-like object is required, not 'function'" error
-    from moviepy.editor import ImageClip
+    stroke = stroke_width if stroke_width > 0 and stroke_color else 0
     
-    # Create an ImageClip from our rendered image array
-    clip = ImageClip(img_array)
-    # Make it last for 1 second (will be overridden when setting start/end times)
-    clip = clip.set_duration(1)
+    placements = []
+    pos = 0
+    for word in text.split(" "):
+        if word:
+            bbox, stroke_mask, fill_mask = _get_word_masks(word, font, font_path, fontsize, stroke)
+            x = int(round(xy[0] + font.getlength(text[:pos]) + bbox[0]))
+            y = xy[1] + bbox[1]
+            placements.append(((x, y), stroke_mask, fill_mask))
+        pos += len(word) + 1
     
-    return clip
+    draw = ImageDraw.Draw(img)
+    if stroke:
+        for dest, stroke_mask, _ in placements:
+            draw.bitmap(dest, stroke_mask, fill=stroke_color)
+    for dest, _, fill_mask in placements:
+        draw.bitmap(dest, fill_mask, fill=color)
+    return True
+
+def _get_word_masks(word: str, font: ImageFont, font_path: str, fontsize: int,
+                    stroke_width: int) -> tuple:
+    """Get the bounding box and the outline and fill coverage masks of a word"""
+    key = (word, fontsize, font_path, stroke_width)
+    cached = _WORD_GLYPH_CACHE.get(key)
+    if cached is None:
+        bbox = font.getbbox(word, stroke_width=stroke_width)
+        size = (max(1, bbox[2] - bbox[0]), max(1, bbox[3] - bbox[1]))
+        origin = (-bbox[0], -bbox[1])
+        
+        stroke_mask = None
+        if stroke_width:
+            stroke_mask = Image.new('L', size, 0)
+            ImageDraw.Draw(stroke_mask).text(origin, word, font=font, fill=255,
+                                             stroke_width=stroke_width, stroke_fill=255)
+        fill_mask = Image.new('L', size, 0)
+        ImageDraw.Draw(fill_mask).text(origin, word, font=font, fill=255)
+        
+        if len(_WORD_GLYPH_CACHE) >= WORD_GLYPH_CACHE_MAX_SIZE:
+            _WORD_GLYPH_CACHE.clear()
+        cached = _WORD_GLYPH_CACHE[key] = (bbox, stroke_mask, fill_mask)
+    return cached
 
+@lru_cache(maxsize=512)
+def _render_shadow(
+    text: str,
+    font_path: str,
+    fontsize: int,
+    blur_radius: int,
+    padding: int
+) -> Image:
+    """
+    Render the blurred shadow of a caption as an L-mode alpha mask
+    
+    The shadow does not depend on text color or outline, so captions that
+    differ only in those share one blur. The returned image is cached and
+    must not be modified.
+    """
+    font = _get_font(font_path, fontsize)
+    text_size = _get_text_size(text, font)
+    
+    # Draw and blur the shadow as a single-channel mask rather than RGBA
+    shadow_mask = Image.new('L', (text_size[0] + padding * 2, text_size[1] + padding * 2), 0)
+    ImageDraw.Draw(shadow_mask).text((padding, padding), text, font=font, fill=200)
+    shadow_mask = shadow_mask.filter(ImageFilter.GaussianBlur(radius=blur_radius))
+    
+    # Squaring matches pasting the shadow through its own alpha
+    return shadow_mask.point(lambda v: v * v // 255)
+
+@lru_cache(maxsize=32)
 def _get_font(font_path: str, size: int) -> ImageFont:
-    """Get a font for rendering text"""
+    """Get a font for rendering text, shared per (path, size)"""
     if font_path and os.path.exists(font_path):
-        return ImageFont.truetype(font_path, size)
+        try:
+            return ImageFont.truetype(font_path, size)
+        except IOError:
+            pass
     return ImageFont.load_default()
 
+@lru_cache(maxsize=4096)
 def _get_text_size(text: str, font: ImageFont) -> tuple:
-    """Calculate the size of text with the given font"""
+    """Calculate the size of text with the given font, memoized per (text, font)"""
     if hasattr(font, 'getbbox'):
         # Newer Pillow versions
         bbox = font.getbbox(text)
@@ -117,16 +269,6 @@ def _get_text_size(text: str, font: ImageFont) -> tuple:
         # Older Pillow versions
         return font.getsize(text)
 
-def _get_outline_offsets(width: int) -> list:
-    """Generate offset positions for text outline"""
-    offsets = []
-    for x in range(-width, width + 1, max(1, width // 2)):
-        for y in range(-width, width + 1, max(1, width // 2)):
-            if x == 0 and y == 0:
-                continue  # Skip center position (main text)
-            offsets.append((x, y))
-    return offsets
-
 def create_text(
     text: str,
     size: int = 80,
@@ -153,17 +295,8 @@ def create_text(
     if not text:
         text = " "
         
-    # Get font
-    if font and os.path.exists(font):
-        try:
-            font_obj = ImageFont.truetype(font, size)
-        except IOError:
-            font_obj = ImageFont.load_default()
-    else:
-        if FONT_PATH and os.path.exists(FONT_PATH):
-            font_obj = ImageFont.truetype(FONT_PATH, size)
-        else:
-            font_obj = ImageFont.load_default()
+    # Get font, falling back to the default caption font
+    font_obj = _get_font(font if font and os.path.exists(font) else FONT_PATH, size)
     
     # Calculate text size
     text_size = _get_text_size(text, font_obj)
@@ -178,13 +311,11 @@ def create_text(
     
     draw = ImageDraw.Draw(img)
     
-    # Draw text outline
+    # Draw main text, with Pillow rasterizing the outline in the same pass
     if stroke_width > 0 and stroke_color:
-        for offset_x, offset_y in _get_outline_offsets(stroke_width):
-            draw.text((padding + offset_x, padding + offset_y), 
-                     text, font=font_obj, fill=stroke_color)
-    
-    # Draw main text
-    draw.text((padding, padding), text, font=font_obj, fill=color)
+        draw.text((padding, padding), text, font=font_obj, fill=color,
+                  stroke_width=stroke_width, stroke_fill=stroke_color)
+    else:
+        draw.text((padding, padding), text, font=font_obj, fill=color)
     
     return img
\ No newline at end of file
@@ -9,8 +9,11 @@ import sys
 import logging
 from pathlib import Path
 
+# Project root, resolved once so the script works from any working directory
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
 # Add parent directory to path so we can import app modules
-sys.path.append(str(Path(__file__).parent.parent.parent))
+sys.path.append(str(PROJECT_ROOT))
 
 from backend.app.services.r2 import upload_fileobj, file_exists, get_file_url
 from backend.app.core.config import settings
@@ -30,22 +33,10 @@ def main():
         logger.info(f"Fallback B-roll already exists at: {get_file_url(fallback_key)}")
         return
     
-    # Look for fallback image in uploads directory - different paths depending on where script is run from
-    possible_paths = [
-        Path("uploads/broll/fallback.png"),  # If run from project root
-        Path("../uploads/broll/fallback.png"),  # If run from backend dir
-        Path("../../uploads/broll/fallback.png"),  # If run from scripts dir
-    ]
-    
-    fallback_path = None
-    for path in possible_paths:
-        if path.exists():
-            fallback_path = path
-            logger.info(f"Found fallback image at: {fallback_path}")
-            break
-            
-    if not fallback_path:
-        logger.error(f"Fallback image not found in any of the expected locations: {possible_paths}")
+    # Fallback image lives in the project's uploads directory
+    fallback_path = PROJECT_ROOT / "uploads/broll/fallback.png"
+    if not fallback_path.exists():
+        logger.error(f"Fallback image not found at: {fallback_path}")
         return
     
     # Upload the fallback image
@@ -12,7 +12,7 @@ import time
 import secrets
 from botocore.exceptions import ClientError
 from app.core.config import settings
-from app.services.r2 import upload_fileobj, get_file_url, s3, BUCKET, file_exists
+from app.services.r2 import upload_fileobj, get_file_url, s3, BUCKET, file_exists, invalidate_exists
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, 
@@ -83,7 +83,9 @@ def test_upload_and_retrieve():
 
         logger.info(f"File uploaded successfully: {url}")
         
-        # Check if file exists using the file_exists function
+        # Check if file exists using the file_exists function; drop the entry
+        # the upload cached so the check goes to R2
+        invalidate_exists(key)
         assert file_exists(key), f"file_exists check failed for key: {key}"
         logger.info(f"file_exists check passed for key: {key}")
 
@@ -104,6 +106,7 @@ def test_upload_and_retrieve():
         try:
             logger.info(f"Deleting test file: {key}")
             s3.delete_object(Bucket=BUCKET, Key=key)
+            invalidate_exists(key)
             logger.info("Test file deleted")
         except Exception as e:
             logger.error(f"Failed to delete test file: {e}")
@@ -0,0 +1,132 @@
+"""
+Test module for the R2 existence cache
+Runs offline against a stubbed S3 client
+"""
+
+import sys
+
+import pytest
+
+pytest.importorskip("boto3")
+
+from app.core.config import settings
+
+# The R2 module validates its settings on import; any placeholder will do
+# since no request reaches R2
+PLACEHOLDER_SETTINGS = {
+    "R2_ENDPOINT": "https://r2.example.com",
+    "R2_ACCESS_KEY_ID": "test",
+    "R2_SECRET_ACCESS_KEY": "test",
+    "R2_BUCKET": "test-bucket",
+}
+
+
+@pytest.fixture(scope="module")
+def r2():
+    """The R2 module, imported with placeholder settings where none are configured"""
+    already_imported = "app.services.r2" in sys.modules
+    with pytest.MonkeyPatch.context() as mp:
+        for name, placeholder in PLACEHOLDER_SETTINGS.items():
+            if not getattr(settings, name):
+                mp.setattr(settings, name, placeholder)
+
+        from app.services import r2
+        yield r2
+
+    # Don't leave a module bound to placeholder settings for other tests
+    if not already_imported:
+        import app.services
+        sys.modules.pop("app.services.r2", None)
+        vars(app.services).pop("r2", None)
+
+
+class StubS3:
+    """S3 client stub that knows a fixed set of keys and counts HEAD requests"""
+
+    def __init__(self, keys=()):
+        self.keys = set(keys)
+        self.head_calls = 0
+
+    def head_object(self, Bucket, Key):
+        self.head_calls += 1
+        if Key not in self.keys:
+            raise Exception("An error occurred (404) when calling the HeadObject operation: Not Found")
+        return {}
+
+    def get_paginator(self, operation):
+        assert operation == "list_objects_v2"
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        keys = sorted(k for k in self.keys if k.startswith(Prefix))
+        # Two pages, to exercise pagination
+        half = len(keys) // 2
+        return [{"Contents": [{"Key": k} for k in keys[:half]]},
+                {"Contents": [{"Key": k} for k in keys[half:]]}]
+
+
+class Clock:
+    """Controllable replacement for time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def stub_s3(r2, monkeypatch):
+    stub = StubS3({"final/a.mp4", "final/b.mp4", "broll/c.png"})
+    monkeypatch.setattr(r2, "s3", stub)
+    monkeypatch.setattr(r2, "_exists_cache", {})
+    return stub
+
+
+@pytest.fixture
+def clock(r2, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(r2.time, "monotonic", clock)
+    return clock
+
+
+def test_file_exists_caches_hits(r2, stub_s3, clock):
+    assert r2.file_exists("final/a.mp4")
+    assert r2.file_exists("final/a.mp4")
+    assert stub_s3.head_calls == 1
+
+
+def test_file_exists_caches_misses(r2, stub_s3, clock):
+    assert not r2.file_exists("final/missing.mp4")
+    assert not r2.file_exists("final/missing.mp4")
+    assert stub_s3.head_calls == 1
+
+
+def test_file_exists_entries_expire(r2, stub_s3, clock):
+    assert r2.file_exists("final/a.mp4")
+    stub_s3.keys.discard("final/a.mp4")
+
+    clock.now += r2.EXISTS_CACHE_TTL + 1
+    assert not r2.file_exists("final/a.mp4")
+    assert stub_s3.head_calls == 2
+
+
+def test_invalidate_exists(r2, stub_s3, clock):
+    assert r2.file_exists("final/a.mp4")
+    stub_s3.keys.discard("final/a.mp4")
+    r2.invalidate_exists("final/a.mp4")
+
+    assert not r2.file_exists("final/a.mp4")
+    assert stub_s3.head_calls == 2
+
+
+def test_warm_prefix(r2, stub_s3, clock):
+    assert r2.warm_prefix("final/") == 2
+
+    assert r2.file_exists("final/a.mp4")
+    assert r2.file_exists("final/b.mp4")
+    assert stub_s3.head_calls == 0
+
+    # Keys outside the prefix still go to R2
+    assert r2.file_exists("broll/c.png")
+    assert stub_s3.head_calls == 1
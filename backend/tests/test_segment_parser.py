@@ -0,0 +1,130 @@
+"""
+Test module for the caption segment parser
+"""
+
+import numpy as np
+import pytest
+
+from app.services import segment_parser
+from app.services.segment_parser import (
+    parse,
+    has_partial_sentence,
+    calculate_display_time,
+    _last_sentence_end,
+)
+
+
+def fits(max_chars):
+    """Fit function accepting captions up to max_chars characters"""
+    return lambda text: len(text) <= max_chars
+
+
+def make_words(text, start=0.0, step=0.5):
+    """Build word entries with evenly spaced timestamps"""
+    return [
+        {"text": word, "start": start + i * step, "end": start + (i + 1) * step}
+        for i, word in enumerate(text.split())
+    ]
+
+
+def test_last_sentence_end():
+    assert _last_sentence_end("no enders here") == -1
+    assert _last_sentence_end("one. two! three") == 8
+    assert _last_sentence_end("wait...") == 6
+    assert _last_sentence_end("") == -1
+
+
+def test_has_partial_sentence():
+    assert has_partial_sentence("It works. And then some")
+    assert not has_partial_sentence("It works.")
+    assert not has_partial_sentence("It works. Ok")
+    assert not has_partial_sentence("no sentence end at all")
+
+
+def test_parse_splits_words_to_fit():
+    segments = [{"text": "one two three four five", "start": 0.0, "end": 2.5,
+                 "words": make_words("one two three four five")}]
+    captions = parse(segments, fits(9), allow_partial_sentences=True)
+
+    assert [c["text"] for c in captions] == ["one two", "three", "four five"]
+    assert captions[0]["start"] == 0.0
+    assert captions[1]["start"] == 1.0
+    assert all(c["end"] >= c["start"] for c in captions)
+
+
+def test_parse_breaks_at_sentence_end():
+    segments = [{"text": "Hi there. How are you", "start": 0.0, "end": 2.5,
+                 "words": make_words("Hi there. How are you")}]
+    captions = parse(segments, fits(18))
+
+    assert captions[0]["text"] == "Hi there."
+    assert captions[1]["text"] == "How are you"
+    assert all(c["end"] >= c["start"] for c in captions)
+    # The sentence split falls inside the time span of the words before it
+    assert 0.0 < captions[1]["start"] < 1.5
+
+
+def test_parse_segment_without_words():
+    segments = [{"text": "short", "start": 1.0, "end": 2.0}]
+    captions = parse(segments, fits(20))
+
+    assert [c["text"] for c in captions] == ["short"]
+    assert captions[0]["start"] == 1.0
+
+
+def test_parse_long_segment_without_words():
+    segments = [{"text": "alpha beta gamma delta", "start": 0.0, "end": 4.0}]
+    captions = parse(segments, fits(11), allow_partial_sentences=True)
+
+    assert " ".join(c["text"] for c in captions) == "alpha beta gamma delta"
+    assert captions[0]["start"] == 0.0
+    assert all(len(c["text"]) <= 11 for c in captions)
+
+
+def test_parse_mixed_segments_keep_order():
+    segments = [
+        {"text": "one two", "start": 0.0, "end": 1.0, "words": make_words("one two")},
+        {"text": "three four", "start": 1.0, "end": 2.0},
+    ]
+    captions = parse(segments, fits(9), allow_partial_sentences=True)
+
+    assert [c["text"] for c in captions] == ["one two", "three", "four"]
+    assert [c["start"] for c in captions] == sorted(c["start"] for c in captions)
+
+
+def test_calculate_display_time_extends_short_captions():
+    captions = [
+        {"text": "a" * 30, "start": 0.0, "end": 0.5},
+        {"text": "b", "start": 1.0, "end": 1.2},
+    ]
+    calculate_display_time(captions)
+
+    # Extended up to 0.1s before the next caption
+    assert captions[0]["end"] == 0.9
+    # Last caption extends to the minimum duration
+    assert captions[1]["end"] == 2.0
+
+
+@pytest.mark.parametrize("kernel_name", ["_adjust_ends", "_adjust_ends_jit"])
+def test_adjust_ends_matches_python_fallback(kernel_name, monkeypatch):
+    kernel = getattr(segment_parser, kernel_name)
+    if kernel is None:
+        pytest.skip("numba is not installed")
+
+    captions = [
+        {"text": "a" * 30, "start": 0.0, "end": 0.5},
+        {"text": "b" * 100, "start": 1.0, "end": 1.5},
+        {"text": "c", "start": 8.0, "end": 9.5},
+        {"text": "d" * 10, "start": 9.6, "end": 9.7},
+    ]
+
+    # Python fallback
+    monkeypatch.setattr(segment_parser, "_adjust_ends_jit", None)
+    expected = [c["end"] for c in calculate_display_time([dict(c) for c in captions])]
+
+    text_lens = np.asarray([len(c["text"]) for c in captions], dtype=np.float64)
+    starts = np.asarray([c["start"] for c in captions], dtype=np.float64)
+    ends = np.asarray([c["end"] for c in captions], dtype=np.float64)
+    kernel(text_lens, starts, ends, 1.0, 5.0, 15.0)
+
+    assert ends.tolist() == pytest.approx(expected)
@@ -4,66 +4,255 @@ Clipso Unified Deployment Entry Point
 This script starts the backend server which also serves the frontend static files
 """
 
+import argparse
+import hashlib
 import os
-import subprocess
+import shutil
 import sys
-import time
+from concurrent.futures import ThreadPoolExecutor
 
-def install_dependencies():
-    """Install required Python dependencies"""
-    print("Installing Python dependencies...")
+REQUIREMENTS_FILE = os.path.join("backend", "requirements.txt")
+# Hash of the interpreter and requirements file as of the last successful install
+REQUIREMENTS_STAMP = os.path.join("backend", ".requirements.stamp")
+
+STATIC_DIR = os.path.join("backend", "static")
+# Git tree hash of frontend/ that the static files were built from. Kept
+# outside STATIC_DIR, whose files the backend serves publicly
+BUILD_ID_FILE = os.path.join("backend", ".frontend-build-id")
+
+# Created after a successful startup; its presence skips the directory checks
+LAYOUT_SENTINEL = ".clipso-layout-ok"
+
+# Environment variables not passed on to the backend server
+SERVER_ENV_EXCLUDED_PREFIXES = ("PIP_", "NPM_", "NODE_", "VIRTUALENV_")
+
+# Startup messages, queued so they reach stdout in a single write
+_messages = []
+
+def _log(message):
+    """Queue a startup message"""
+    _messages.append(message)
+
+def _flush_log():
+    """Write all queued startup messages at once"""
+    messages = _messages[:]
+    del _messages[:len(messages)]
+    if messages:
+        sys.stdout.write("\n".join(messages) + "\n")
+        sys.stdout.flush()
+
+def _fail(message):
+    """Report a startup error along with the queued messages, and exit"""
+    _log(message)
+    _flush_log()
+    sys.exit(1)
+
+def _spawn(args, env=None):
+    """
+    Run a command to completion, raising CalledProcessError if it fails
+    
+    Uses posix_spawn where available, which starts the child without copying
+    this process's memory mappings the way fork does.
+    """
+    import subprocess
+    
+    if not hasattr(os, "posix_spawnp"):
+        subprocess.run(args, env=env, check=True)
+        return
+    
+    pid = os.posix_spawnp(args[0], args, os.environ if env is None else env)
+    _, status = os.waitpid(pid, 0)
+    returncode = os.waitstatus_to_exitcode(status)
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, args)
+
+def install_dependencies(force=False):
+    """Install required Python dependencies, unless they are already installed"""
+    # Images built from the Dockerfile install dependencies at build time
+    if os.environ.get("CLIPSO_DEPS_BAKED") == "1":
+        _log("Python dependencies baked into the image. Skipping install step.")
+        return
+    
+    # Include the interpreter so a different venv with the same checkout
+    # still gets its own install
+    with open(REQUIREMENTS_FILE, "rb") as f:
+        requirements_hash = hashlib.sha256(
+            sys.executable.encode() + b"\0" + f.read()
+        ).hexdigest()
+    
+    if not force and os.path.exists(REQUIREMENTS_STAMP):
+        with open(REQUIREMENTS_STAMP) as f:
+            if f.read().strip() == requirements_hash:
+                _log("Python dependencies unchanged. Skipping install step.")
+                return
+    
+    import subprocess
+    
+    _log("Installing Python dependencies...")
+    uv = shutil.which("uv")
+    if uv:
+        # uv resolves and installs much faster than pip; target this interpreter
+        args = [uv, "pip", "install", "--python", sys.executable, "-r", REQUIREMENTS_FILE]
+    else:
+        # Prefer existing wheels and keep them in a persistent cache so
+        # reinstalls don't rebuild packages from source. pip runs in a child
+        # process: in-process it would configure this interpreter's logging,
+        # which the backend server shares
+        pip_cache_dir = os.environ.get("PIP_CACHE_DIR", os.path.expanduser("~/.cache/pip"))
+        args = [sys.executable, "-m", "pip", "install", "--prefer-binary",
+                "--cache-dir", pip_cache_dir, "-r", REQUIREMENTS_FILE]
     try:
-        subprocess.run([sys.executable, "-m", "pip", "install", "-r", "backend/requirements.txt"], check=True)
+        _spawn(args)
     except subprocess.CalledProcessError:
-        print("Error: Failed to install Python dependencies.")
-        sys.exit(1)
+        _fail("Error: Failed to install Python dependencies.")
+    
+    # pip byte-compiles the packages it installs; do the same for the backend
+    # once, on all cores, instead of on first import while serving
+    import compileall
+    compileall.compile_dir("backend", quiet=1, workers=0)
+    
+    with open(REQUIREMENTS_STAMP, "w") as f:
+        f.write(requirements_hash)
+
+def _frontend_tree_id():
+    """Get git's tree hash for frontend/ at HEAD, or None if git can't tell us"""
+    import subprocess
+    
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD:frontend"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _write_build_id(build_id):
+    """Record the frontend tree the static files were built from, if possible"""
+    try:
+        with open(BUILD_ID_FILE, "w") as f:
+            f.write(build_id)
+    except OSError:
+        # Only a hint for the next startup
+        pass
 
 def ensure_frontend_built():
-    """Ensure frontend is built and ready to be served"""
-    if not os.path.exists(os.path.join("backend", "static", "index.html")):
-        print("Frontend static files not found. Running deployment script...")
+    """Ensure frontend is built from the current frontend sources and ready to be served"""
+    # One directory scan instead of stat-ing the path component by component
+    try:
+        with os.scandir(STATIC_DIR) as entries:
+            names = {entry.name for entry in entries if entry.is_file()}
+    except FileNotFoundError:
+        names = set()
+    built = "index.html" in names
+    
+    # Rebuild a stale build, as recorded by the frontend tree it was built from.
+    # Without git, or without a recorded tree (such as the committed build on a
+    # fresh checkout), trust the existing build
+    current_build_id = _frontend_tree_id()
+    stale = False
+    if built and current_build_id:
         try:
-            subprocess.run(["./deploy.sh"], check=True)
-        except subprocess.CalledProcessError:
-            print("Error: Deployment script failed.")
-            sys.exit(1)
+            with open(BUILD_ID_FILE) as f:
+                stale = f.read().strip() != current_build_id
+        except FileNotFoundError:
+            _write_build_id(current_build_id)
+    
+    if not built or stale:
+        import subprocess
+        
+        if stale:
+            _log("Frontend static files are out of date. Building frontend...")
+        else:
+            _log("Frontend static files not found. Building frontend...")
+        try:
+            # Clean install from the lockfile, reusing npm's persistent cache.
+            # --prefix stands in for a working directory, which posix_spawn lacks
+            _spawn(["npm", "ci", "--prefix", "frontend", "--prefer-offline", "--no-audit", "--no-fund"])
+            _spawn(["npm", "run", "build", "--prefix", "frontend"],
+                   env={**os.environ, "NODE_ENV": "production"})
+        except (OSError, subprocess.CalledProcessError):
+            _fail("Error: Frontend build failed.")
+        
+        # Deploy the build for the backend to serve
+        shutil.copytree(os.path.join("frontend", "dist"), STATIC_DIR, dirs_exist_ok=True)
+        
+        if current_build_id:
+            _write_build_id(current_build_id)
     else:
-        print("Frontend static files found. Skipping build step.")
+        _log("Frontend static files found. Skipping build step.")
 
 def start_backend():
     """Start the backend server"""
-    print("Starting backend server...")
-    os.chdir("backend")
+    _log("Starting backend server...")
+    
+    # Leave out install and build tool settings the server has no use for
+    for key in [key for key in os.environ if key.startswith(SERVER_ENV_EXCLUDED_PREFIXES)]:
+        del os.environ[key]
+    
     try:
-        # Use exec to replace the current process with uvicorn
-        args = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "0.0.0.0", "--port", "5000"]
-        print(f"Executing: {' '.join(args)}")
-        os.execv(sys.executable, args)
+        # Make the backend package importable without changing directory,
+        # here and in any Python processes the server starts
+        backend_dir = os.path.abspath("backend")
+        sys.path.insert(0, backend_dir)
+        os.environ["PYTHONPATH"] = os.pathsep.join(
+            path for path in (backend_dir, os.environ.get("PYTHONPATH")) if path
+        )
+        
+        # Run uvicorn in this interpreter instead of exec-ing a fresh one
+        import uvicorn
+        from app.main import app
+        
+        _flush_log()
+        uvicorn.run(app, host="0.0.0.0", port=5000)
     except Exception as e:
-        print(f"Error starting backend server: {e}")
-        sys.exit(1)
+        _fail(f"Error starting backend server: {e}")
 
 if __name__ == "__main__":
-    print("Starting Clipso unified application...")
-    
-    # Make sure we're in the root directory
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    os.chdir(script_dir)
-    
-    # Make sure all directories exist
-    if not os.path.exists("backend"):
-        print("Error: Backend directory not found.")
-        sys.exit(1)
-    
-    if not os.path.exists("frontend"):
-        print("Error: Frontend directory not found.")
-        sys.exit(1)
-    
-    # Install dependencies first
-    install_dependencies()
-    
-    # Make sure frontend is built
-    ensure_frontend_built()
-    
-    # Start the backend server
-    start_backend()
\ No newline at end of file
+    # Write out queued messages even if startup fails unexpectedly
+    try:
+        parser = argparse.ArgumentParser(description="Start the Clipso application")
+        parser.add_argument("--force-install", action="store_true",
+                            help="Reinstall Python dependencies even if requirements.txt is unchanged")
+        cli_args = parser.parse_args()
+        
+        _log("Starting Clipso unified application...")
+        
+        # Make sure we're in the root directory
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        os.chdir(script_dir)
+        
+        # Make sure all directories exist, unless a previous startup already did
+        try:
+            os.stat(LAYOUT_SENTINEL)
+            layout_checked = True
+        except FileNotFoundError:
+            layout_checked = False
+        
+        if not layout_checked:
+            # List the root directory once
+            with os.scandir(".") as entries:
+                top_level_dirs = {entry.name for entry in entries if entry.is_dir()}
+        
+            if "backend" not in top_level_dirs:
+                _fail("Error: Backend directory not found.")
+        
+            if "frontend" not in top_level_dirs:
+                _fail("Error: Frontend directory not found.")
+        
+        # Install dependencies and make sure the frontend is built. They work on
+        # separate trees, so run them side by side
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            installing = executor.submit(install_dependencies, force=cli_args.force_install)
+            building = executor.submit(ensure_frontend_built)
+            installing.result()
+            building.result()
+        
+        if not layout_checked:
+            try:
+                open(LAYOUT_SENTINEL, "w").close()
+            except OSError:
+                # Only a hint for the next startup, e.g. the filesystem is read-only
+                pass
+        
+        # Start the backend server
+        start_backend()
+    finally:
+        _flush_log()